@@ -12,5 +12,11 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    ROLL_MAX_COUNT: int = 10_000
+    ROLL_STREAM_MAX_COUNT: int = 10_000_000
+    ROLL_STREAM_CHUNK_SIZE: int = 10_000
+    DICE_CACHE_SIZE: int = 1024
+    DISTRIBUTION_CACHE_OUTCOMES: int = 4_000_000
+
 
 settings = Settings()
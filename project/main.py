@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 
 from project.routers.auth import router as Auth
+from project.routers.dice import router as Dice
 from project.routers.frameworks import router as Framework
 from project.routers.users import router as User
 
@@ -9,6 +10,7 @@ app = FastAPI()
 app.include_router(User)
 app.include_router(Auth)
 app.include_router(Framework)
+app.include_router(Dice)
 
 
 @app.get('/')
@@ -35,6 +35,12 @@ class Framework(Base):
     entries: Mapped[dict] = mapped_column(
         pgJSON, init=False, server_default='{}'
     )
+    alias_table: Mapped[dict | None] = mapped_column(
+        pgJSON, init=False, default=None, nullable=True
+    )
+    reference_ids: Mapped[list[int]] = mapped_column(
+        pgJSON, init=False, default_factory=list, server_default='[]'
+    )
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True, index=True)
@@ -0,0 +1,46 @@
+import numpy as np
+
+LOW_MASK = np.uint64(0xFFFFFFFF)
+
+
+def build_alias_table(weights) -> tuple[np.ndarray, np.ndarray]:
+    # Vose's alias method: O(n) to build, O(1) per draw afterwards
+    size = len(weights)
+    scaled = (np.asarray(weights, dtype=float) * size / sum(weights)).tolist()
+
+    prob = [1.0] * size
+    alias = list(range(size))
+
+    small = [i for i, value in enumerate(scaled) if value < 1]
+    large = [i for i, value in enumerate(scaled) if value >= 1]
+
+    while small and large:
+        less, more = small.pop(), large.pop()
+
+        prob[less] = scaled[less]
+        alias[less] = more
+
+        scaled[more] += scaled[less] - 1
+        if scaled[more] < 1:
+            small.append(more)
+        else:
+            large.append(more)
+
+    return np.asarray(prob), np.asarray(alias, dtype=np.intp)
+
+
+def sample_alias(
+    prob: np.ndarray, alias: np.ndarray, words: np.ndarray
+) -> np.ndarray:
+    # one 64-bit word per draw: the high half picks the column and the low
+    # half is the biased coin, so draws never depend on each other
+    columns = sample_uniform(len(prob), words)
+    keep = (words & LOW_MASK) < prob[columns] * 2**32
+
+    return np.where(keep, columns, alias[columns])
+
+
+def sample_uniform(size: int, words: np.ndarray) -> np.ndarray:
+    columns = ((words >> np.uint64(32)) * np.uint64(size)) >> np.uint64(32)
+
+    return columns.astype(np.intp)
@@ -0,0 +1,324 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from project.config import settings
+
+MAX_DICE = 100
+MAX_SIDES = 10_000
+MAX_EXPLOSIONS = 100
+MAX_CONSTANT = 1_000_000
+# every result must stay exact in int64 and in float64 probabilities
+MAX_RESULT = 2**53
+
+TOKEN_PATTERN = re.compile(r'(\d+|d%|d|kh|kl|k|!|[-+*/()])')
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+
+
+class DiceSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Constant:
+    value: int
+
+    def __str__(self):
+        return str(self.value)
+
+    def bounds(self) -> tuple[int, int]:
+        return self.value, self.value
+
+    def evaluate(self, rng: np.random.Generator, repeat: int) -> np.ndarray:
+        return np.full(repeat, self.value, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class Dice:
+    count: int
+    sides: int
+    explode: bool = False
+    keep: tuple[str, int] | None = None
+
+    def __str__(self):
+        notation = f'{self.count}d{self.sides}'
+
+        if self.explode:
+            notation += '!'
+        if self.keep:
+            notation += f'k{self.keep[0]}{self.keep[1]}'
+
+        return notation
+
+    def bounds(self) -> tuple[int, int]:
+        kept = self.keep[1] if self.keep else self.count
+        # an exploding die adds at most one more roll per explosion round
+        highest = self.sides * (MAX_EXPLOSIONS + 1 if self.explode else 1)
+
+        return kept, kept * highest
+
+    def evaluate(self, rng: np.random.Generator, repeat: int) -> np.ndarray:
+        # every die of every repetition is drawn in one call
+        rolls = rng.integers(1, self.sides + 1, size=(repeat, self.count))
+
+        if self.explode:
+            exploding = rolls == self.sides
+
+            for _ in range(MAX_EXPLOSIONS):
+                if not exploding.any():
+                    break
+
+                extra = rng.integers(1, self.sides + 1, size=exploding.sum())
+                rolls[exploding] += extra
+                exploding[exploding] = extra == self.sides
+
+        if self.keep:
+            kind, amount = self.keep
+            rolls = np.sort(rolls, axis=1)
+            rolls = rolls[:, -amount:] if kind == 'h' else rolls[:, :amount]
+
+        return rolls.sum(axis=1, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class Negate:
+    operand: 'Node'
+
+    def __str__(self):
+        if isinstance(self.operand, BinaryOp):
+            return f'-({self.operand})'
+
+        return f'-{self.operand}'
+
+    def bounds(self) -> tuple[int, int]:
+        low, high = self.operand.bounds()
+
+        return -high, -low
+
+    def evaluate(self, rng: np.random.Generator, repeat: int) -> np.ndarray:
+        return -self.operand.evaluate(rng, repeat)
+
+
+@dataclass(frozen=True)
+class BinaryOp:
+    operator: str
+    left: 'Node'
+    right: 'Node'
+
+    def __str__(self):
+        precedence = PRECEDENCE[self.operator]
+        left, right = str(self.left), str(self.right)
+
+        if (
+            isinstance(self.left, BinaryOp)
+            and PRECEDENCE[self.left.operator] < precedence
+        ):
+            left = f'({left})'
+        if (
+            isinstance(self.right, BinaryOp)
+            and PRECEDENCE[self.right.operator] <= precedence
+        ):
+            right = f'({right})'
+
+        return f'{left}{self.operator}{right}'
+
+    def bounds(self) -> tuple[int, int]:
+        left_low, left_high = self.left.bounds()
+        right_low, right_high = self.right.bounds()
+
+        match self.operator:
+            case '+':
+                return left_low + right_low, left_high + right_high
+            case '-':
+                return left_low - right_high, left_high - right_low
+            case '*':
+                corners = [
+                    left * right
+                    for left in (left_low, left_high)
+                    for right in (right_low, right_high)
+                ]
+                return min(corners), max(corners)
+            case '/':
+                # the divisor is always a positive constant
+                return left_low // right_low, left_high // right_low
+
+    def evaluate(self, rng: np.random.Generator, repeat: int) -> np.ndarray:
+        left = self.left.evaluate(rng, repeat)
+        right = self.right.evaluate(rng, repeat)
+
+        match self.operator:
+            case '+':
+                return left + right
+            case '-':
+                return left - right
+            case '*':
+                return left * right
+            case '/':
+                return left // right
+
+
+Node = Constant | Dice | Negate | BinaryOp
+
+
+class Parser:
+    def __init__(self, expression: str):
+        self.tokens = self.tokenize(expression)
+        self.position = 0
+
+    @staticmethod
+    def tokenize(expression: str) -> list[str]:
+        tokens = TOKEN_PATTERN.split(expression)
+
+        # split() leaves the unmatched text at the even positions
+        if any(text.strip() for text in tokens[::2]):
+            raise DiceSyntaxError(f'Invalid dice expression: {expression}')
+
+        return tokens[1::2]
+
+    def peek(self) -> str | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise DiceSyntaxError('Unexpected end of dice expression')
+
+        self.position += 1
+        return token
+
+    def number(self) -> int:
+        token = self.take()
+        if not token.isdigit():
+            raise DiceSyntaxError(f'Expected a number, found {token!r}')
+
+        value = int(token)
+        if value > MAX_CONSTANT:
+            raise DiceSyntaxError(
+                f'Numbers cannot be larger than {MAX_CONSTANT}'
+            )
+
+        return value
+
+    def parse(self) -> Node:
+        node = self.expression()
+
+        if self.peek() is not None:
+            raise DiceSyntaxError(f'Unexpected token {self.peek()!r}')
+
+        low, high = node.bounds()
+        if max(-low, high) > MAX_RESULT:
+            raise DiceSyntaxError('Dice expression results are too large')
+
+        return node
+
+    def expression(self) -> Node:
+        node = self.term()
+
+        while self.peek() in {'+', '-'}:
+            node = BinaryOp(self.take(), node, self.term())
+
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+
+        while self.peek() in {'*', '/'}:
+            operator = self.take()
+            right = self.unary()
+
+            if operator == '/' and not (
+                isinstance(right, Constant) and right.value > 0
+            ):
+                raise DiceSyntaxError('Can only divide by a positive number')
+
+            node = BinaryOp(operator, node, right)
+
+        return node
+
+    def unary(self) -> Node:
+        if self.peek() == '-':
+            self.take()
+            return Negate(self.unary())
+
+        if self.peek() == '+':
+            self.take()
+            return self.unary()
+
+        return self.atom()
+
+    def atom(self) -> Node:
+        token = self.peek()
+
+        if token == '(':
+            self.take()
+            node = self.expression()
+            if self.take() != ')':
+                raise DiceSyntaxError('Unbalanced parentheses')
+            return node
+
+        count = (
+            self.number() if token is not None and token.isdigit() else None
+        )
+
+        if self.peek() in {'d', 'd%'}:
+            return self.dice(1 if count is None else count)
+
+        if token is None:
+            raise DiceSyntaxError('Unexpected end of dice expression')
+
+        if count is None:
+            raise DiceSyntaxError(f'Unexpected token {token!r}')
+
+        return Constant(count)
+
+    def dice(self, count: int) -> Dice:
+        sides = 100 if self.take() == 'd%' else self.number()
+
+        if not 1 <= count <= MAX_DICE:
+            raise DiceSyntaxError(
+                f'Dice count must be between 1 and {MAX_DICE}'
+            )
+        if not 1 <= sides <= MAX_SIDES:
+            raise DiceSyntaxError(
+                f'Dice sides must be between 1 and {MAX_SIDES}'
+            )
+
+        explode = self.peek() == '!'
+        if explode:
+            self.take()
+            if sides == 1:
+                raise DiceSyntaxError('A one-sided die cannot explode')
+
+        keep = None
+        if self.peek() in {'k', 'kh', 'kl'}:
+            kind = 'l' if self.take() == 'kl' else 'h'
+            amount = self.number()
+
+            if not 1 <= amount <= count:
+                raise DiceSyntaxError(
+                    f'Can only keep between 1 and {count} dice'
+                )
+            keep = (kind, amount)
+
+        return Dice(count, sides, explode, keep)
+
+
+@lru_cache(maxsize=settings.DICE_CACHE_SIZE)
+def _compile(expression: str) -> Node:
+    return Parser(expression).parse()
+
+
+def compile_expression(expression: str) -> Node:
+    return _compile(expression.strip().lower())
+
+
+def roll_expression(
+    expression: Node, repeat: int, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    rng = rng or np.random.default_rng()
+
+    return expression.evaluate(rng, repeat)
@@ -0,0 +1,217 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from project.config import settings
+from project.models import Framework
+from project.rolls.dice import BinaryOp, Constant, Dice, Negate, Node
+from project.rolls.tables import (
+    entry_text,
+    entry_weight,
+    ordered_entries,
+    parse_range,
+)
+from project.utils.cache import LRUCache
+
+MAX_OUTCOMES = 1_000_000
+ROUND_OFF = 1e-15
+
+# ('dice', expression) or ('framework', id, updated_at, modifier) -> the
+# compact probability vector; the cache is bounded by the summed number of
+# outcomes, and the response rows are rebuilt from it on every request
+distribution_cache = LRUCache(
+    maxsize=settings.DISTRIBUTION_CACHE_OUTCOMES, weigh=len
+)
+
+
+class UnsupportedDistributionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Distribution:
+    # probabilities[i] is the chance of rolling exactly low + i
+    low: int
+    probabilities: np.ndarray
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.low + np.arange(len(self.probabilities))
+
+
+def point(value: int) -> Distribution:
+    return Distribution(value, np.ones(1))
+
+
+def fft_power(probabilities: np.ndarray, exponent: int) -> np.ndarray:
+    # the sum of `exponent` independent copies is a single pointwise power
+    # in frequency space, instead of exponent - 1 direct convolutions
+    size = exponent * (len(probabilities) - 1) + 1
+    length = 1 << (size - 1).bit_length()
+
+    spectrum = np.fft.rfft(probabilities, length) ** exponent
+    result = np.fft.irfft(spectrum, length)[:size]
+
+    return normalize(result)
+
+
+def fft_convolve(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    size = len(first) + len(second) - 1
+    length = 1 << (size - 1).bit_length()
+
+    spectrum = np.fft.rfft(first, length) * np.fft.rfft(second, length)
+    result = np.fft.irfft(spectrum, length)[:size]
+
+    return normalize(result)
+
+
+def normalize(probabilities: np.ndarray) -> np.ndarray:
+    # FFT round-off leaves tiny negative values where the true chance is 0
+    probabilities = np.clip(probabilities, 0, None)
+    probabilities[probabilities < ROUND_OFF] = 0
+
+    return probabilities / probabilities.sum()
+
+
+def check_size(size: int):
+    if size > MAX_OUTCOMES:
+        raise UnsupportedDistributionError(
+            'Expression has too many possible outcomes for an exact '
+            'distribution'
+        )
+
+
+def add(first: Distribution, second: Distribution) -> Distribution:
+    check_size(len(first.probabilities) + len(second.probabilities) - 1)
+
+    return Distribution(
+        first.low + second.low,
+        fft_convolve(first.probabilities, second.probabilities),
+    )
+
+
+def negate(distribution: Distribution) -> Distribution:
+    return Distribution(
+        -int(distribution.values[-1]), distribution.probabilities[::-1]
+    )
+
+
+def combine(
+    first: Distribution, second: Distribution, operator: np.ufunc
+) -> Distribution:
+    check_size(len(first.probabilities) * len(second.probabilities))
+
+    values = operator.outer(first.values, second.values).ravel()
+    probabilities = np.multiply.outer(
+        first.probabilities, second.probabilities
+    ).ravel()
+
+    low = int(values.min())
+    check_size(int(values.max()) - low + 1)
+
+    return Distribution(low, np.bincount(values - low, weights=probabilities))
+
+
+def distribution_of(node: Node) -> Distribution:
+    match node:
+        case Constant(value=value):
+            return point(value)
+        case Dice(explode=True) | Dice(keep=(_, _)):
+            raise UnsupportedDistributionError(
+                'Exact distributions are not available for exploding dice '
+                'or keep modifiers'
+            )
+        case Dice(count=count, sides=sides):
+            return Distribution(
+                count, fft_power(np.ones(sides) / sides, count)
+            )
+        case Negate(operand=operand):
+            return negate(distribution_of(operand))
+        case BinaryOp(operator=operator, left=left, right=right):
+            return apply_operator(
+                operator, distribution_of(left), distribution_of(right)
+            )
+
+
+def apply_operator(
+    operator: str, first: Distribution, second: Distribution
+) -> Distribution:
+    match operator:
+        case '+':
+            return add(first, second)
+        case '-':
+            return add(first, negate(second))
+        case '*':
+            return combine(first, second, np.multiply)
+        case '/':
+            return combine(first, second, np.floor_divide)
+
+
+def dice_outcomes(node: Node) -> list[dict]:
+    key = ('dice', str(node))
+    distribution = distribution_cache.get(key)
+
+    if distribution is None:
+        distribution = distribution_of(node)
+        distribution_cache.put(key, distribution)
+
+    nonzero = np.flatnonzero(distribution.probabilities)
+
+    return [
+        {'value': value, 'probability': probability}
+        for value, probability in zip(
+            (distribution.low + nonzero).tolist(),
+            distribution.probabilities[nonzero].tolist(),
+        )
+    ]
+
+
+def row_distribution(entries: dict, modifier: Node) -> np.ndarray:
+    rows = ordered_entries(entries)
+
+    if all(isinstance(row, dict) and row.get('range') for row in rows):
+        # ranged tables are read off a die spanning every range
+        bounds = np.array([parse_range(row['range']) for row in rows])
+        low, high = int(bounds[0, 0]), int(bounds[-1, 1])
+        check_size(high - low + 1)
+        base = Distribution(low, np.full(high - low + 1, 1 / (high - low + 1)))
+        row_of_value = np.searchsorted(bounds[:, 1], np.arange(low, high + 1))
+    else:
+        # other tables are read by row number, from 1 to len(rows)
+        weights = np.array([entry_weight(row) for row in rows], dtype=float)
+        low, high = 1, len(rows)
+        base = Distribution(low, weights / weights.sum())
+        row_of_value = np.arange(len(rows))
+
+    total = add(base, distribution_of(modifier))
+
+    # results past either end of the table land on the first or last row
+    clamped = np.clip(total.values, low, high) - low
+    per_value = np.bincount(
+        clamped, weights=total.probabilities, minlength=high - low + 1
+    )
+
+    return np.bincount(row_of_value, weights=per_value, minlength=len(rows))
+
+
+def framework_outcomes(framework: Framework, modifier: Node) -> list[dict]:
+    key = ('framework', framework.id, framework.updated_at, str(modifier))
+    probabilities = distribution_cache.get(key)
+
+    if probabilities is None:
+        probabilities = row_distribution(framework.entries, modifier)
+        distribution_cache.put(key, probabilities)
+
+    return [
+        {
+            'row': f'row_{row}',
+            'text': entry_text(entry),
+            'probability': probability,
+        }
+        for row, (entry, probability) in enumerate(
+            zip(ordered_entries(framework.entries), probabilities.tolist())
+        )
+    ]
@@ -0,0 +1,24 @@
+import numpy as np
+
+# Philox emits four 64-bit words per counter value
+WORDS_PER_COUNTER = 4
+
+
+def philox_generator(
+    seed: int, stream: int, offset: int = 0
+) -> np.random.Generator:
+    counter, skip = divmod(offset, WORDS_PER_COUNTER)
+    bit_generator = np.random.Philox(
+        key=np.array([seed, stream], dtype=np.uint64), counter=counter
+    )
+    bit_generator.random_raw(skip)
+
+    return np.random.Generator(bit_generator)
+
+
+def philox_words(seed: int, offset: int, n: int) -> np.ndarray:
+    # word k of a seeded session depends only on (seed, k), so any slice
+    # can be recomputed without replaying the words before it
+    rng = philox_generator(seed, 0, offset)
+
+    return rng.bit_generator.random_raw(n)
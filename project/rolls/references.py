@@ -0,0 +1,241 @@
+from collections import Counter
+from collections.abc import Iterable
+from http import HTTPStatus
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from project.models import Framework
+from project.rolls.philox import philox_generator, philox_words
+from project.rolls.tables import CompiledTable, compile_table, draw_indexes
+from project.utils.cache import LRUCache
+from project.utils.constants import ErrorMessages
+
+MAX_REFERENCE_DEPTH = 32
+
+# (framework id, updated_at) -> every framework id reachable from it
+dependency_cache = LRUCache(maxsize=1024)
+
+
+async def load_reference_graph(
+    session: AsyncSession, user_id: int, roots: Iterable[int]
+) -> dict[int, list[int]]:
+    graph = {}
+    frontier = set(roots)
+
+    # one query per level, fetching only the ids and their references
+    while frontier:
+        rows = await session.execute(
+            select(Framework.id, Framework.reference_ids).where(
+                and_(
+                    Framework.id.in_(frontier),
+                    Framework.user_id == user_id,
+                    Framework.is_deleted == False,  # noqa
+                )
+            )
+        )
+
+        graph.update(rows.tuples().all())
+        frontier = {
+            reference
+            for framework_id in frontier
+            for reference in graph.get(framework_id, [])
+        } - graph.keys()
+
+    return graph
+
+
+def has_cycle(graph: dict[int, list[int]], start: int) -> bool:
+    visiting, visited = set(), set()
+    stack = [(start, iter(graph.get(start, [])))]
+    visiting.add(start)
+
+    while stack:
+        node, children = stack[-1]
+        child = next(children, None)
+
+        if child is None:
+            stack.pop()
+            visiting.discard(node)
+            visited.add(node)
+        elif child in visiting:
+            return True
+        elif child not in visited:
+            visiting.add(child)
+            stack.append((child, iter(graph.get(child, []))))
+
+    return False
+
+
+async def validate_references(
+    session: AsyncSession,
+    user_id: int,
+    references: list[int],
+    framework_id: int | None = None,
+):
+    graph = await load_reference_graph(session, user_id, references)
+
+    unknown = set(references) - graph.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=ErrorMessages.FRAMEWORK_UNKNOWN_REFERENCES.format(
+                ids=', '.join(map(str, sorted(unknown)))
+            ),
+        )
+
+    if framework_id is None:
+        return
+
+    graph[framework_id] = references
+    if has_cycle(graph, framework_id):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=ErrorMessages.FRAMEWORK_REFERENCE_CYCLE,
+        )
+
+
+async def load_dependencies(
+    session: AsyncSession, user_id: int, framework: Framework
+) -> frozenset[int]:
+    key = (framework.id, framework.updated_at)
+    dependencies = dependency_cache.get(key)
+
+    if dependencies is None:
+        graph = await load_reference_graph(
+            session, user_id, framework.reference_ids
+        )
+        dependencies = frozenset(framework.reference_ids).union(
+            graph, *graph.values()
+        )
+        dependency_cache.put(key, dependencies)
+
+    return dependencies
+
+
+async def load_tables(
+    session: AsyncSession, user_id: int, frameworks: list[Framework]
+) -> dict[int, CompiledTable]:
+    tables = {
+        framework.id: compile_table(framework) for framework in frameworks
+    }
+
+    dependencies = set()
+    for framework in frameworks:
+        dependencies |= await load_dependencies(session, user_id, framework)
+
+    pending = dependencies - tables.keys()
+    if not pending:
+        return tables
+
+    # the whole dependency closure is fetched with a single query
+    referenced = await session.scalars(
+        select(Framework).where(
+            and_(
+                Framework.id.in_(pending),
+                Framework.user_id == user_id,
+                Framework.is_deleted == False,  # noqa
+            )
+        )
+    )
+    referenced = referenced.all()
+
+    # a cached closure goes stale when a referenced framework is edited
+    # to point somewhere new; walk the graph again in that case
+    if any(set(item.reference_ids) - dependencies for item in referenced):
+        for framework in frameworks:
+            dependency_cache.pop((framework.id, framework.updated_at))
+        return await load_tables(session, user_id, frameworks)
+
+    tables.update((item.id, compile_table(item)) for item in referenced)
+
+    return tables
+
+
+def render_template(template: tuple, draws: dict) -> str:
+    return ''.join(
+        (next(draws[part]) if part in draws else f'[[table:{part}]]')
+        if position % 2
+        else part
+        for position, part in enumerate(template)
+    )
+
+
+def expand_templates(
+    tables: dict[int, CompiledTable],
+    templates: list[tuple],
+    rng: np.random.Generator,
+    depth: int,
+) -> list[str]:
+    # every reference to the same table is drawn in one batch
+    counts = Counter(
+        reference
+        for template in templates
+        for reference in template[1::2]
+        if reference in tables and tables[reference].size
+    )
+    draws = {
+        reference: iter(expand_rolls(tables, reference, count, rng, depth))
+        for reference, count in counts.items()
+    }
+
+    return [render_template(template, draws) for template in templates]
+
+
+def roll_indexes(
+    tables: dict[int, CompiledTable], framework_id: int, words: np.ndarray
+) -> tuple[list[str], np.ndarray, list[tuple]]:
+    table = tables[framework_id]
+
+    indexes = draw_indexes(table, words)
+    results = table.texts[indexes].tolist()
+
+    positions = np.flatnonzero(np.isin(indexes, list(table.templates)))
+    templates = [table.templates[indexes[position]] for position in positions]
+
+    return results, positions, templates
+
+
+def expand_rolls(
+    tables: dict[int, CompiledTable],
+    framework_id: int,
+    n: int,
+    rng: np.random.Generator | None = None,
+    depth: int = 0,
+) -> list[str]:
+    rng = rng or np.random.default_rng()
+    words = rng.bit_generator.random_raw(n)
+
+    results, positions, templates = roll_indexes(tables, framework_id, words)
+
+    if not templates or depth >= MAX_REFERENCE_DEPTH:
+        return results
+
+    expanded = expand_templates(tables, templates, rng, depth + 1)
+    for position, text in zip(positions, expanded):
+        results[position] = text
+
+    return results
+
+
+def expand_seeded_rolls(
+    tables: dict[int, CompiledTable],
+    framework_id: int,
+    n: int,
+    seed: int,
+    offset: int = 0,
+) -> list[str]:
+    # roll k of a seeded session uses word k of the (seed, 0) stream, and
+    # its references draw from their own (seed, k + 1) stream, so every
+    # roll can be recomputed on its own, in any order or on any worker
+    words = philox_words(seed, offset, n)
+
+    results, positions, templates = roll_indexes(tables, framework_id, words)
+
+    for position, template in zip(positions, templates):
+        rng = philox_generator(seed, offset + int(position) + 1)
+        results[position] = expand_templates(tables, [template], rng, 1)[0]
+
+    return results
@@ -0,0 +1,42 @@
+import json
+from collections.abc import Iterator
+
+import numpy as np
+
+from project.rolls.references import expand_rolls, expand_seeded_rolls
+from project.rolls.tables import CompiledTable
+from project.schemas import RollStreamFormat, StreamRollParams
+
+MEDIA_TYPES = {
+    RollStreamFormat.NDJSON: 'application/x-ndjson',
+    RollStreamFormat.SSE: 'text/event-stream',
+}
+
+
+def stream_rolls(
+    tables: dict[int, CompiledTable],
+    framework_id: int,
+    params: StreamRollParams,
+    chunk_size: int,
+) -> Iterator[str]:
+    # a sync generator, so the server drains it from a worker thread and
+    # only one chunk is ever held in memory
+    rng = np.random.default_rng()
+    end = params.offset + params.n
+
+    for start in range(params.offset, end, chunk_size):
+        size = min(chunk_size, end - start)
+
+        if params.seed is None:
+            results = expand_rolls(tables, framework_id, size, rng)
+        else:
+            results = expand_seeded_rolls(
+                tables, framework_id, size, params.seed, start
+            )
+
+        chunk = json.dumps({'offset': start, 'results': results})
+
+        if params.format == RollStreamFormat.SSE:
+            yield f'data: {chunk}\n\n'
+        else:
+            yield f'{chunk}\n'
@@ -0,0 +1,135 @@
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from project.models import Framework
+from project.rolls.alias import (
+    build_alias_table,
+    sample_alias,
+    sample_uniform,
+)
+
+ROW_PREFIX = 'row_'
+REFERENCE_PATTERN = re.compile(r'\[\[table:(\d+)\]\]')
+
+
+@dataclass(frozen=True)
+class CompiledTable:
+    framework_id: int
+    texts: np.ndarray
+    prob: np.ndarray | None = None
+    alias: np.ndarray | None = None
+    # row index -> text split around references, with the referenced
+    # framework ids at the odd positions
+    templates: dict[int, tuple] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.texts)
+
+
+def parse_range(value: str) -> tuple[int, int]:
+    low, _, high = value.partition('-')
+
+    return int(low), int(high or low)
+
+
+def entry_text(entry: str | dict) -> str:
+    if isinstance(entry, str):
+        return entry
+
+    return entry['text']
+
+
+def entry_weight(entry: str | dict) -> float:
+    if isinstance(entry, str):
+        return 1
+
+    if entry.get('range'):
+        low, high = parse_range(entry['range'])
+        return high - low + 1
+
+    return entry.get('weight', 1)
+
+
+def ordered_entries(entries: dict) -> list:
+    # entries are validated as row_0..row_N, but the stored JSON order is
+    # not guaranteed, so rows are placed by their number instead
+    rows = [None] * len(entries)
+
+    for key, entry in entries.items():
+        rows[int(key.removeprefix(ROW_PREFIX))] = entry
+
+    return rows
+
+
+def compile_template(text: str) -> tuple | None:
+    parts = REFERENCE_PATTERN.split(text)
+
+    if len(parts) == 1:
+        return None
+
+    return tuple(
+        int(part) if position % 2 else part
+        for position, part in enumerate(parts)
+    )
+
+
+def extract_references(entries: dict) -> list[int]:
+    references = {
+        int(reference)
+        for entry in entries.values()
+        for reference in REFERENCE_PATTERN.findall(entry_text(entry))
+    }
+
+    return sorted(references)
+
+
+def compile_alias_table(entries: dict) -> dict | None:
+    weights = [entry_weight(entry) for entry in ordered_entries(entries)]
+
+    if len(set(weights)) <= 1:
+        return None
+
+    prob, alias = build_alias_table(weights)
+
+    return {'prob': prob.tolist(), 'alias': alias.tolist()}
+
+
+def compile_table(framework: Framework) -> CompiledTable:
+    rows = [entry_text(entry) for entry in ordered_entries(framework.entries)]
+
+    texts = np.empty(len(rows), dtype=object)
+    texts[:] = rows
+
+    templates = {
+        row: template
+        for row, template in enumerate(map(compile_template, rows))
+        if template
+    }
+
+    # alias_table is compiled when the framework is saved and is None for
+    # uniform tables; rows saved before the column existed only had plain
+    # string entries, so they are uniform as well
+    alias_table = framework.alias_table
+
+    if alias_table is None:
+        return CompiledTable(
+            framework_id=framework.id, texts=texts, templates=templates
+        )
+
+    return CompiledTable(
+        framework_id=framework.id,
+        texts=texts,
+        prob=np.asarray(alias_table['prob']),
+        alias=np.asarray(alias_table['alias'], dtype=np.intp),
+        templates=templates,
+    )
+
+
+def draw_indexes(table: CompiledTable, words: np.ndarray) -> np.ndarray:
+    if table.prob is None:
+        return sample_uniform(table.size, words)
+
+    return sample_alias(table.prob, table.alias, words)
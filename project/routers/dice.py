@@ -0,0 +1,53 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from project.models import User
+from project.rolls.dice import compile_expression, roll_expression
+from project.rolls.distributions import (
+    UnsupportedDistributionError,
+    dice_outcomes,
+)
+from project.schemas import (
+    DiceDistribution,
+    DiceExpressionSchema,
+    DiceRoll,
+    DiceRollSchema,
+)
+from project.security.auth import get_current_user
+from project.utils.constants import ErrorMessages
+
+CurrentUser = Annotated[User, Depends(get_current_user)]
+
+router = APIRouter(
+    prefix='/dice',
+    tags=['dice'],
+    responses={404: {'detail': ErrorMessages.NOT_FOUND}},
+)
+
+
+@router.post('/roll', response_model=DiceRoll)
+async def roll_dice(roll: DiceRollSchema, current_user: CurrentUser):
+    expression = compile_expression(roll.expression)
+    results = roll_expression(expression, roll.repeat)
+
+    return {'expression': str(expression), 'results': results.tolist()}
+
+
+@router.post('/distribution', response_model=DiceDistribution)
+async def get_dice_distribution(
+    dice: DiceExpressionSchema, current_user: CurrentUser
+):
+    expression = compile_expression(dice.expression)
+
+    try:
+        outcomes = await run_in_threadpool(dice_outcomes, expression)
+    except UnsupportedDistributionError as error:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        )
+
+    return {'expression': str(expression), 'outcomes': outcomes}
@@ -1,23 +1,48 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from project.config import settings
 from project.database import get_db
 from project.models import Framework, User
+from project.rolls.dice import compile_expression
+from project.rolls.distributions import (
+    UnsupportedDistributionError,
+    framework_outcomes,
+)
+from project.rolls.references import (
+    expand_rolls,
+    expand_seeded_rolls,
+    load_tables,
+    validate_references,
+)
+from project.rolls.streaming import MEDIA_TYPES, stream_rolls
+from project.rolls.tables import compile_alias_table, extract_references
 from project.schemas import (
+    BatchRollPublic,
+    BatchRollSchema,
+    FrameworkDistribution,
+    FrameworkDistributionSchema,
     FrameworkPublic,
     FrameworkPublicList,
+    FrameworkRoll,
     FrameworkSchema,
     Message,
+    RollParams,
+    StreamRollParams,
 )
 from project.security.auth import get_current_user
 from project.utils.constants import ErrorMessages
 
 Session = Annotated[AsyncSession, Depends(get_db)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+RollQuery = Annotated[RollParams, Query()]
+StreamRollQuery = Annotated[StreamRollParams, Query()]
 
 router = APIRouter(
     prefix='/frameworks',
@@ -87,7 +112,13 @@ async def create_framework(
             detail=ErrorMessages.FRAMEWORK_EMPTY_ENTRIES,
         )
 
-    db_framework.entries = framework.entries
+    db_framework.entries = framework.model_dump(exclude_none=True)['entries']
+    db_framework.alias_table = compile_alias_table(db_framework.entries)
+    db_framework.reference_ids = extract_references(db_framework.entries)
+
+    await validate_references(
+        session, current_user.id, db_framework.reference_ids
+    )
 
     session.add(db_framework)
     await session.commit()
@@ -119,8 +150,18 @@ async def update_framework(
             detail=ErrorMessages.FRAMEWORK_NOT_FOUND,
         )
 
+    entries = framework.model_dump(exclude_none=True)['entries']
+    reference_ids = extract_references(entries)
+
+    await validate_references(
+        session, current_user.id, reference_ids, framework_id
+    )
+
     db_framework.name = framework.name
-    db_framework.entries = framework.entries
+    db_framework.entries = entries
+    db_framework.alias_table = compile_alias_table(entries)
+    db_framework.reference_ids = reference_ids
+    db_framework.set_updated_at()
 
     await session.commit()
     await session.refresh(current_user)
@@ -154,3 +195,180 @@ async def delete_framework(
     await session.commit()
 
     return {'detail': 'Framework deleted'}
+
+
+@router.post('/{framework_id}/roll', response_model=FrameworkRoll)
+async def roll_framework(
+    framework_id: int,
+    session: Session,
+    current_user: CurrentUser,
+    params: RollQuery,
+):
+    framework = await session.scalar(
+        select(Framework).where(
+            and_(
+                Framework.id == framework_id,
+                Framework.user_id == current_user.id,
+                Framework.is_deleted == False,  # noqa
+            )
+        )
+    )
+
+    if not framework:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ErrorMessages.FRAMEWORK_NOT_FOUND,
+        )
+
+    if not framework.entries:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=ErrorMessages.FRAMEWORK_EMPTY_ENTRIES,
+        )
+
+    tables = await load_tables(session, current_user.id, [framework])
+
+    if params.seed is None:
+        results = expand_rolls(tables, framework.id, params.n)
+    else:
+        results = expand_seeded_rolls(
+            tables, framework.id, params.n, params.seed, params.offset
+        )
+
+    return {'framework_id': framework.id, 'results': results}
+
+
+@router.post('/{framework_id}/roll/stream', response_class=StreamingResponse)
+async def stream_framework_rolls(
+    framework_id: int,
+    session: Session,
+    current_user: CurrentUser,
+    params: StreamRollQuery,
+):
+    framework = await session.scalar(
+        select(Framework).where(
+            and_(
+                Framework.id == framework_id,
+                Framework.user_id == current_user.id,
+                Framework.is_deleted == False,  # noqa
+            )
+        )
+    )
+
+    if not framework:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ErrorMessages.FRAMEWORK_NOT_FOUND,
+        )
+
+    if not framework.entries:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=ErrorMessages.FRAMEWORK_EMPTY_ENTRIES,
+        )
+
+    tables = await load_tables(session, current_user.id, [framework])
+
+    return StreamingResponse(
+        stream_rolls(
+            tables, framework.id, params, settings.ROLL_STREAM_CHUNK_SIZE
+        ),
+        media_type=MEDIA_TYPES[params.format],
+        headers={'Cache-Control': 'no-cache'},
+    )
+
+
+@router.post('/roll', response_model=BatchRollPublic)
+async def roll_frameworks(
+    batch: BatchRollSchema,
+    session: Session,
+    current_user: CurrentUser,
+):
+    framework_ids = {item.framework_id for item in batch.rolls}
+
+    frameworks = await session.scalars(
+        select(Framework).where(
+            and_(
+                Framework.id.in_(framework_ids),
+                Framework.user_id == current_user.id,
+                Framework.is_deleted == False,  # noqa
+            )
+        )
+    )
+
+    frameworks = frameworks.all()
+
+    if framework_ids - {framework.id for framework in frameworks}:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ErrorMessages.FRAMEWORK_NOT_FOUND,
+        )
+
+    if not all(framework.entries for framework in frameworks):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=ErrorMessages.FRAMEWORK_EMPTY_ENTRIES,
+        )
+
+    tables = await load_tables(session, current_user.id, frameworks)
+
+    results = [
+        {
+            'framework_id': item.framework_id,
+            'results': expand_rolls(tables, item.framework_id, item.count),
+        }
+        for item in batch.rolls
+    ]
+
+    return {'results': results}
+
+
+@router.post(
+    '/{framework_id}/distribution', response_model=FrameworkDistribution
+)
+async def get_framework_distribution(
+    framework_id: int,
+    distribution: FrameworkDistributionSchema,
+    session: Session,
+    current_user: CurrentUser,
+):
+    framework = await session.scalar(
+        select(Framework).where(
+            and_(
+                Framework.id == framework_id,
+                Framework.user_id == current_user.id,
+                Framework.is_deleted == False,  # noqa
+            )
+        )
+    )
+
+    if not framework:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ErrorMessages.FRAMEWORK_NOT_FOUND,
+        )
+
+    if not framework.entries:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=ErrorMessages.FRAMEWORK_EMPTY_ENTRIES,
+        )
+
+    modifier = compile_expression(distribution.modifier)
+
+    try:
+        # FFT over large ranges takes long enough to stall the event loop
+        outcomes = await run_in_threadpool(
+            framework_outcomes, framework, modifier
+        )
+    except UnsupportedDistributionError as error:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        )
+
+    return {
+        'framework_id': framework.id,
+        'modifier': str(modifier),
+        'outcomes': outcomes,
+    }
@@ -1,13 +1,32 @@
+import math
 import re
+from enum import Enum
 from http import HTTPStatus
 
 from fastapi import HTTPException
-from pydantic import BaseModel, ConfigDict, EmailStr, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    model_validator,
+)
+
+from project.config import settings
+from project.rolls.dice import DiceSyntaxError, compile_expression
+from project.rolls.tables import parse_range
+from project.utils.constants import ErrorMessages
+
+
+class FrameworkEntry(BaseModel):
+    text: str
+    weight: float | None = Field(default=None, gt=0, allow_inf_nan=False)
+    range: str | None = Field(default=None, pattern=r'^\d+(-\d+)?$')
 
 
 class FrameworkSchema(BaseModel):
     name: str
-    entries: dict[str, str] = {
+    entries: dict[str, str | FrameworkEntry] = {
         'row_0': 'string',
         'row_1': 'string',
         'row_2': 'string',
@@ -37,8 +56,63 @@ class FrameworkSchema(BaseModel):
                 status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
                 detail=f'Line numbers in dict keys are not sequencial and/or not ordered',  # noqa
             )
+
+        self.validate_weights()
+
         return self
 
+    def validate_weights(self):
+        structured = {
+            key: entry
+            for key, entry in self.entries.items()
+            if isinstance(entry, FrameworkEntry)
+        }
+
+        conflicting = [
+            key
+            for key, entry in structured.items()
+            if entry.weight is not None and entry.range is not None
+        ]
+
+        if conflicting:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=ErrorMessages.FRAMEWORK_WEIGHT_AND_RANGE.format(
+                    keys=', '.join(conflicting)
+                ),
+            )
+
+        weights = [
+            1 if isinstance(entry, str) else entry.weight or 1
+            for entry in self.entries.values()
+        ]
+
+        if not math.isfinite(sum(weights)):
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=ErrorMessages.FRAMEWORK_INVALID_WEIGHTS,
+            )
+
+        ranges = [entry.range for entry in structured.values() if entry.range]
+
+        if not ranges:
+            return
+
+        if len(ranges) != len(self.entries):
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=ErrorMessages.FRAMEWORK_MIXED_RANGES,
+            )
+
+        expected_low = parse_range(ranges[0])[0]
+        for low, high in map(parse_range, ranges):
+            if low != expected_low or high < low:
+                raise HTTPException(
+                    status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                    detail=ErrorMessages.FRAMEWORK_INVALID_RANGES,
+                )
+            expected_low = high + 1
+
 
 class FrameworkPublic(BaseModel):
     id: int
@@ -52,6 +126,110 @@ class FrameworkPublicList(BaseModel):
     frameworks: list[FrameworkPublic]
 
 
+class RollStreamFormat(str, Enum):
+    NDJSON = 'ndjson'
+    SSE = 'sse'
+
+
+class RollParams(BaseModel):
+    n: int = Field(default=1, ge=1, le=settings.ROLL_MAX_COUNT)
+    seed: int | None = Field(default=None, ge=0, lt=2**64)
+    offset: int = Field(default=0, ge=0, lt=2**62)
+
+
+class StreamRollParams(RollParams):
+    n: int = Field(ge=1, le=settings.ROLL_STREAM_MAX_COUNT)
+    format: RollStreamFormat = RollStreamFormat.NDJSON
+
+
+class FrameworkRoll(BaseModel):
+    framework_id: int
+    results: list[str]
+
+
+class BatchRollItem(BaseModel):
+    framework_id: int
+    count: int = Field(default=1, ge=1)
+
+
+class BatchRollSchema(BaseModel):
+    rolls: list[BatchRollItem] = Field(min_length=1)
+
+    @model_validator(mode='after')
+    def validate_total_count(self):
+        if sum(item.count for item in self.rolls) > settings.ROLL_MAX_COUNT:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=ErrorMessages.ROLL_COUNT_EXCEEDED.format(
+                    limit=settings.ROLL_MAX_COUNT
+                ),
+            )
+        return self
+
+
+class BatchRollPublic(BaseModel):
+    results: list[FrameworkRoll]
+
+
+def validate_dice_expression(expression: str):
+    try:
+        compile_expression(expression)
+    except DiceSyntaxError as error:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        )
+
+
+class DiceExpressionSchema(BaseModel):
+    expression: str = Field(max_length=100)
+
+    @model_validator(mode='after')
+    def validate_expression(self):
+        validate_dice_expression(self.expression)
+        return self
+
+
+class DiceRollSchema(DiceExpressionSchema):
+    repeat: int = Field(default=1, ge=1, le=settings.ROLL_MAX_COUNT)
+
+
+class DiceRoll(BaseModel):
+    expression: str
+    results: list[int]
+
+
+class DiceOutcome(BaseModel):
+    value: int
+    probability: float
+
+
+class DiceDistribution(BaseModel):
+    expression: str
+    outcomes: list[DiceOutcome]
+
+
+class FrameworkDistributionSchema(BaseModel):
+    modifier: str = Field(default='0', max_length=100)
+
+    @model_validator(mode='after')
+    def validate_modifier(self):
+        validate_dice_expression(self.modifier)
+        return self
+
+
+class FrameworkOutcome(BaseModel):
+    row: str
+    text: str
+    probability: float
+
+
+class FrameworkDistribution(BaseModel):
+    framework_id: int
+    modifier: str
+    outcomes: list[FrameworkOutcome]
+
+
 class UserSchema(BaseModel):
     name: str
     email: EmailStr
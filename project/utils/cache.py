@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from threading import Lock
+from typing import Any
+
+
+class LRUCache:
+    def __init__(
+        self, maxsize: int, weigh: Callable[[Any], int] | None = None
+    ):
+        # without `weigh` every entry counts as 1, so maxsize is an entry
+        # count; with it, maxsize bounds the summed weight of all entries
+        self.maxsize = maxsize
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        # entries may be read and written from threadpool workers
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._discard(key)
+
+            self._data[key] = value
+            self.weight += self.weigh(value)
+
+            while self.weight > self.maxsize:
+                _, evicted = self._data.popitem(last=False)
+                self.weight -= self.weigh(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._discard(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def _discard(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+
+        value = self._data.pop(key)
+        self.weight -= self.weigh(value)
+        return value
@@ -16,6 +16,18 @@ class ErrorMessages:
     FRAMEWORK_NON_SEQUENTIAL = (
         'Line numbers in dict keys are not sequencial and/or not ordered'  # noqa
     )
+    FRAMEWORK_WEIGHT_AND_RANGE = (
+        'Entries must not have both a weight and a range: {keys}'
+    )
+    FRAMEWORK_INVALID_WEIGHTS = 'Entry weights must add up to a finite number'
+    FRAMEWORK_MIXED_RANGES = (
+        'Either every entry has a range or none of them does'
+    )
+    FRAMEWORK_INVALID_RANGES = 'Entry ranges must be ascending and contiguous'
+    FRAMEWORK_UNKNOWN_REFERENCES = 'Referenced frameworks not found: {ids}'
+    FRAMEWORK_REFERENCE_CYCLE = 'Framework references must not form a cycle'
+
+    ROLL_COUNT_EXCEEDED = 'At most {limit} rolls are allowed per request'
 
     NOT_FOUND = 'Not found'
     LOGOUT_SUCCESS = 'Successfully logged out'
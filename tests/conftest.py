@@ -16,6 +16,8 @@ from project.database import get_db
 from project.main import app
 from project.models import Base
 from project.redis import get_redis
+from project.rolls.distributions import distribution_cache
+from project.rolls.references import dependency_cache
 from project.security.auth import get_password_hash
 
 
@@ -118,6 +120,13 @@ def mock_redis_denylist(monkeypatch):
     monkeypatch.setattr(redis_asyncio.Redis, 'set', mock_set)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    dependency_cache.clear()
+    distribution_cache.clear()
+
+
 @pytest_asyncio.fixture
 async def user(db_session):
     password = 'senha1'
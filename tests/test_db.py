@@ -61,6 +61,8 @@ async def test_db_create_framework(db_session, mock_db_time, user: User):
         'is_deleted': False,
         'id': 1,
         'name': 'framework',
+        'alias_table': None,
+        'reference_ids': [],
         'user_id': user.id,
         'entries': {
             'key_1': 'value 1',
@@ -0,0 +1,170 @@
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+
+from project.rolls import distributions
+from project.rolls.dice import compile_expression, roll_expression
+from project.utils.cache import LRUCache
+
+
+def test_roll_dice(client, token):
+    response = client.post(
+        '/dice/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '4d6kh3 + 2', 'repeat': 100},
+    )
+
+    data = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert data['expression'] == '4d6kh3+2'
+    assert len(data['results']) == 100  # noqa
+    assert all(5 <= result <= 20 for result in data['results'])  # noqa
+
+
+def test_roll_dice_arithmetic(client, token):
+    response = client.post(
+        '/dice/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '(1 + 2) * 3 - 8 / 3', 'repeat': 2},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'expression': '(1+2)*3-8/3',
+        'results': [7, 7],
+    }
+
+
+def test_roll_dice_invalid_expression(client, token):
+    response = client.post(
+        '/dice/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '2d6 + banana'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Invalid dice expression: 2d6 + banana'
+    }
+
+
+def test_roll_dice_keep_more_than_rolled(client, token):
+    response = client.post(
+        '/dice/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '2d6kh3'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Can only keep between 1 and 2 dice'}
+
+
+@pytest.mark.parametrize(
+    ('expression', 'detail'),
+    [
+        ('99999999999999999999', 'Numbers cannot be larger than 1000000'),
+        (
+            '100d10000*100d10000*100d10000*100d10000',
+            'Dice expression results are too large',
+        ),
+        ('3d6-', 'Unexpected end of dice expression'),
+    ],
+)
+def test_roll_dice_rejected_expression(client, token, expression, detail):
+    response = client.post(
+        '/dice/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': expression},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': detail}
+
+
+def test_roll_dice_unauthorized(client):
+    response = client.post('/dice/roll', json={'expression': '1d20'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_compile_expression_is_cached():
+    assert compile_expression('2d10*5') is compile_expression(' 2D10*5 ')
+
+
+def test_compile_expression_unary_plus():
+    assert str(compile_expression('+1d2')) == '1d2'
+    assert str(compile_expression('3 * +2')) == '3*2'
+
+
+def test_roll_exploding_dice():
+    rng = np.random.default_rng(0)
+    results = roll_expression(compile_expression('1d2!'), 10_000, rng)
+
+    # a 2 always explodes, so it is never a final result
+    assert results.min() >= 1
+    assert not (results == 2).any()  # noqa
+    assert results.max() > 2  # noqa
+
+
+def test_dice_distribution(client, token):
+    response = client.post(
+        '/dice/distribution',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '2d6'},
+    )
+
+    data = response.json()
+    probabilities = {
+        outcome['value']: outcome['probability']
+        for outcome in data['outcomes']
+    }
+
+    assert response.status_code == HTTPStatus.OK
+    assert data['expression'] == '2d6'
+    assert list(probabilities) == list(range(2, 13))
+    assert probabilities[7] == pytest.approx(6 / 36)
+    assert probabilities[12] == pytest.approx(1 / 36)
+
+
+def test_dice_distribution_scaled(client, token):
+    response = client.post(
+        '/dice/distribution',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '1d2*5 - 1'},
+    )
+
+    outcomes = response.json()['outcomes']
+
+    assert response.status_code == HTTPStatus.OK
+    assert [outcome['value'] for outcome in outcomes] == [4, 9]
+    assert [outcome['probability'] for outcome in outcomes] == pytest.approx([
+        0.5,
+        0.5,
+    ])
+
+
+def test_dice_distribution_unsupported(client, token):
+    response = client.post(
+        '/dice/distribution',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'expression': '4d6kh3'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Exact distributions are not available for exploding '
+        'dice or keep modifiers'
+    }
+
+
+def test_distribution_cache_is_bounded_by_outcomes(monkeypatch):
+    cache = LRUCache(maxsize=100, weigh=len)
+    monkeypatch.setattr(distributions, 'distribution_cache', cache)
+
+    distributions.dice_outcomes(compile_expression('1d60'))
+    distributions.dice_outcomes(compile_expression('1d50'))
+
+    assert len(cache) == 1
+    assert cache.weight == 50  # noqa
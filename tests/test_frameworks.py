@@ -1,5 +1,9 @@
+import json
 from http import HTTPStatus
 
+import pytest
+
+from project.config import settings
 from project.schemas import FrameworkPublic
 
 
@@ -179,3 +183,491 @@ def test_delete_framework_already_deleted(client, framework, token):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Framework not found'}
+
+
+def test_roll_framework(client, token):
+    entries = {'row_0': 'goblin', 'row_1': 'orc', 'row_2': 'dragon'}
+    framework_id = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'name': 'encounters', 'entries': entries},
+    ).json()['id']
+
+    response = client.post(
+        f'/frameworks/{framework_id}/roll?n=50',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    data = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert data['framework_id'] == framework_id
+    assert len(data['results']) == 50  # noqa
+    assert set(data['results']) <= set(entries.values())
+
+
+def test_roll_framework_default_count(client, framework, token):
+    response = client.post(
+        f'/frameworks/{framework.id}/roll',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'framework_id': framework.id,
+        'results': ['string'],
+    }
+
+
+def test_roll_framework_invalid_count(client, framework, token):
+    response = client.post(
+        f'/frameworks/{framework.id}/roll?n=0',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_roll_framework_not_found(client, token):
+    response = client.post(
+        '/frameworks/666/roll',  # does not exist
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Framework not found'}
+
+
+def test_create_framework_weighted_and_ranged(client, token):
+    entries = {
+        'row_0': {'text': 'copper', 'range': '01-60'},
+        'row_1': {'text': 'silver', 'range': '61-95'},
+        'row_2': {'text': 'gold', 'range': '96-100'},
+    }
+
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'name': 'loot', 'entries': entries},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['entries'] == entries
+
+    response = client.post(
+        f'/frameworks/{response.json()["id"]}/roll?n=100',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()['results']) <= {'copper', 'silver', 'gold'}
+
+
+def test_roll_framework_weighted(client, token):
+    framework_id = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'skewed',
+            'entries': {
+                'row_0': {'text': 'never', 'weight': 1e-12},
+                'row_1': {'text': 'always', 'weight': 1},
+            },
+        },
+    ).json()['id']
+
+    response = client.post(
+        f'/frameworks/{framework_id}/roll?n=1000',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()['results']) == {'always'}
+
+
+def test_create_framework_weight_and_range(client, token):
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'framework',
+            'entries': {
+                'row_0': {'text': 'data', 'weight': 2, 'range': '1-2'},
+            },
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Entries must not have both a weight and a range: row_0'
+    }
+
+
+def test_create_framework_infinite_weight(client, token):
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'framework',
+            'entries': {
+                'row_0': {'text': 'data', 'weight': float('inf')},
+            },
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_create_framework_weights_overflow(client, token):
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'framework',
+            'entries': {
+                'row_0': {'text': 'data', 'weight': 1e308},
+                'row_1': {'text': 'data', 'weight': 1e308},
+            },
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Entry weights must add up to a finite number'
+    }
+
+
+def test_create_framework_mixed_ranges(client, token):
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'framework',
+            'entries': {
+                'row_0': {'text': 'data', 'range': '1-50'},
+                'row_1': 'data',
+            },
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Either every entry has a range or none of them does'
+    }
+
+
+def test_create_framework_ranges_with_gap(client, token):
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'framework',
+            'entries': {
+                'row_0': {'text': 'data', 'range': '01-15'},
+                'row_1': {'text': 'data', 'range': '17-100'},
+            },
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Entry ranges must be ascending and contiguous'
+    }
+
+
+def test_roll_frameworks_batch(client, framework, token):
+    other_id = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'name': 'weather', 'entries': {'row_0': 'rain'}},
+    ).json()['id']
+
+    response = client.post(
+        '/frameworks/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'rolls': [
+                {'framework_id': other_id, 'count': 2},
+                {'framework_id': framework.id, 'count': 3},
+                {'framework_id': other_id},
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'results': [
+            {'framework_id': other_id, 'results': ['rain', 'rain']},
+            {
+                'framework_id': framework.id,
+                'results': ['string', 'string', 'string'],
+            },
+            {'framework_id': other_id, 'results': ['rain']},
+        ]
+    }
+
+
+def test_roll_frameworks_batch_not_found(client, framework, token):
+    response = client.post(
+        '/frameworks/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'rolls': [
+                {'framework_id': framework.id},
+                {'framework_id': 666},  # does not exist
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Framework not found'}
+
+
+def test_roll_frameworks_batch_too_many_rolls(client, framework, token):
+    response = client.post(
+        '/frameworks/roll',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'rolls': [{'framework_id': framework.id, 'count': 10_001}]},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'At most 10000 rolls are allowed per request'
+    }
+
+
+def test_roll_framework_with_references(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    weapon_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={'name': 'weapons', 'entries': {'row_0': 'axe'}},
+    ).json()['id']
+    monster_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={
+            'name': 'monsters',
+            'entries': {'row_0': f'orc with [[table:{weapon_id}]]'},
+        },
+    ).json()['id']
+    encounter_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={
+            'name': 'encounters',
+            'entries': {
+                'row_0': f'[[table:{monster_id}]] and [[table:{monster_id}]]'
+            },
+        },
+    ).json()['id']
+
+    response = client.post(
+        f'/frameworks/{encounter_id}/roll?n=2', headers=headers
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'] == [
+        'orc with axe and orc with axe',
+        'orc with axe and orc with axe',
+    ]
+
+
+def test_create_framework_unknown_reference(client, token):
+    response = client.post(
+        '/frameworks/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'name': 'framework', 'entries': {'row_0': '[[table:666]]'}},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Referenced frameworks not found: 666'
+    }
+
+
+def test_update_framework_reference_cycle(client, framework, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    child_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={
+            'name': 'child',
+            'entries': {'row_0': f'back to [[table:{framework.id}]]'},
+        },
+    ).json()['id']
+
+    response = client.put(
+        f'/frameworks/{framework.id}',
+        headers=headers,
+        json={
+            'name': 'parent',
+            'entries': {'row_0': f'see [[table:{child_id}]]'},
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Framework references must not form a cycle'
+    }
+
+
+def test_update_framework_self_reference(client, framework, token):
+    response = client.put(
+        f'/frameworks/{framework.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'name': 'framework',
+            'entries': {'row_0': f'[[table:{framework.id}]]'},
+        },
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Framework references must not form a cycle'
+    }
+
+
+def test_stream_framework_rolls_ndjson(client, framework, token, monkeypatch):
+    monkeypatch.setattr(settings, 'ROLL_STREAM_CHUNK_SIZE', 10)
+
+    response = client.post(
+        f'/frameworks/{framework.id}/roll/stream?n=25',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    chunks = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [chunk['offset'] for chunk in chunks] == [0, 10, 20]
+    assert [len(chunk['results']) for chunk in chunks] == [10, 10, 5]
+
+
+def test_stream_framework_rolls_sse(client, framework, token):
+    response = client.post(
+        f'/frameworks/{framework.id}/roll/stream?n=3&format=sse',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert response.text == (
+        'data: {"offset": 0, "results": ["string", "string", "string"]}\n\n'
+    )
+
+
+def test_stream_framework_rolls_not_found(client, token):
+    response = client.post(
+        '/frameworks/666/roll/stream?n=10',  # does not exist
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Framework not found'}
+
+
+def test_roll_framework_seeded_random_access(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    entries = {f'row_{number}': f'result {number}' for number in range(20)}
+
+    framework_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={'name': 'seeded', 'entries': entries},
+    ).json()['id']
+
+    full = client.post(
+        f'/frameworks/{framework_id}/roll?n=30&seed=1234', headers=headers
+    ).json()['results']
+    first = client.post(
+        f'/frameworks/{framework_id}/roll?n=12&seed=1234', headers=headers
+    ).json()['results']
+    rest = client.post(
+        f'/frameworks/{framework_id}/roll?n=18&seed=1234&offset=12',
+        headers=headers,
+    ).json()['results']
+    single = client.post(
+        f'/frameworks/{framework_id}/roll?seed=1234&offset=21',
+        headers=headers,
+    ).json()['results']
+
+    assert first + rest == full
+    assert single == [full[21]]
+
+
+def test_stream_framework_rolls_seeded(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'ROLL_STREAM_CHUNK_SIZE', 7)
+    headers = {'Authorization': f'Bearer {token}'}
+    entries = {f'row_{number}': f'result {number}' for number in range(20)}
+
+    framework_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={'name': 'seeded', 'entries': entries},
+    ).json()['id']
+
+    expected = client.post(
+        f'/frameworks/{framework_id}/roll?n=20&seed=99&offset=5',
+        headers=headers,
+    ).json()['results']
+
+    response = client.post(
+        f'/frameworks/{framework_id}/roll/stream?n=20&seed=99&offset=5',
+        headers=headers,
+    )
+
+    chunks = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [chunk['offset'] for chunk in chunks] == [5, 12, 19]
+    assert sum((chunk['results'] for chunk in chunks), []) == expected
+
+
+def test_framework_distribution_with_modifier(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    framework_id = client.post(
+        '/frameworks/',
+        headers=headers,
+        json={
+            'name': 'loot',
+            'entries': {
+                'row_0': {'text': 'copper', 'range': '1-4'},
+                'row_1': {'text': 'silver', 'range': '5-6'},
+            },
+        },
+    ).json()['id']
+
+    response = client.post(
+        f'/frameworks/{framework_id}/distribution',
+        headers=headers,
+        json={'modifier': '+1d2'},
+    )
+
+    data = response.json()
+
+    # 1d6 + 1d2 lands on 5 or more in 7 of the 12 combinations
+    assert response.status_code == HTTPStatus.OK
+    assert data['modifier'] == '1d2'
+    assert [outcome['row'] for outcome in data['outcomes']] == [
+        'row_0',
+        'row_1',
+    ]
+    assert [
+        outcome['probability'] for outcome in data['outcomes']
+    ] == pytest.approx([5 / 12, 7 / 12])
+
+
+def test_framework_distribution_without_modifier(client, framework, token):
+    response = client.post(
+        f'/frameworks/{framework.id}/distribution',
+        headers={'Authorization': f'Bearer {token}'},
+        json={},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [
+        outcome['probability'] for outcome in response.json()['outcomes']
+    ] == pytest.approx([0.25, 0.25, 0.25, 0.25])